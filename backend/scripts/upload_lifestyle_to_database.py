@@ -18,6 +18,9 @@ Usage:
 Example:
     python upload_lifestyle_to_database.py ./lifestyle_output/session_123
 
+For many small sessions, run upload_worker.py instead: it keeps the database
+connection and table schemas warm and calls upload_lifestyle_data in-process.
+
 Requirements:
     pip install pandas sqlalchemy pymysql openpyxl
 """
@@ -29,6 +32,8 @@ import os
 import sys
 import urllib.parse
 
+from upload_to_database import find_excel_file, insert_dataframe
+
 # Database Configuration
 DB_CONFIG = {
     'host': '35.197.143.222',
@@ -97,7 +102,7 @@ def remove_auto_increment_and_mapping_columns(df, table_name):
     return df
 
 
-def upload_lifestyle_data(folder_path):
+def upload_lifestyle_data(folder_path, engine=None, tables=None):
     """
     Upload all lifestyle Excel files from a folder to the database with proper FK mapping.
     
@@ -111,18 +116,21 @@ def upload_lifestyle_data(folder_path):
     
     Args:
         folder_path: Path to folder containing Excel files
+        engine: Optional existing SQLAlchemy engine (a new one is created if omitted)
+        tables: Optional dict of table name -> reflected sqlalchemy Table
     """
     
-    # Connect to database
-    print("Connecting to database...")
-    try:
-        engine = create_engine(database_url, connect_args={'ssl': {'ssl_disabled': True}})
-        # Test connection
-        with engine.connect() as conn:
-            print("✅ Connected to database successfully!")
-    except Exception as e:
-        print(f"❌ Failed to connect to database: {e}")
-        return
+    if engine is None:
+        # Connect to database
+        print("Connecting to database...")
+        try:
+            engine = create_engine(database_url, connect_args={'ssl': {'ssl_disabled': True}})
+            # Test connection
+            with engine.connect() as conn:
+                print("✅ Connected to database successfully!")
+        except Exception as e:
+            print(f"❌ Failed to connect to database: {e}")
+            return
     
     start_time = time.time()
     print(f"\n{'='*70}")
@@ -145,8 +153,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 1: Uploading tbl_lifestyle (Main Table)")
     print("=" * 70)
     
-    lifestyle_file = os.path.join(folder_path, 'tbl_lifestyle.xlsx')
-    if os.path.exists(lifestyle_file):
+    lifestyle_file = find_excel_file(folder_path, 'tbl_lifestyle.xlsx')
+    if lifestyle_file:
         try:
             df_lifestyle = pd.read_excel(lifestyle_file)
             print(f"📊 Found {len(df_lifestyle)} lifestyle products")
@@ -199,8 +207,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 2: Uploading tbl_lifestyle_detail")
     print("=" * 70)
     
-    detail_file = os.path.join(folder_path, 'tbl_lifestyle_detail.xlsx')
-    if os.path.exists(detail_file):
+    detail_file = find_excel_file(folder_path, 'tbl_lifestyle_detail.xlsx')
+    if detail_file:
         try:
             df_detail = pd.read_excel(detail_file)
             print(f"📊 Found {len(df_detail)} detail records")
@@ -215,13 +223,7 @@ def upload_lifestyle_data(folder_path):
             df_detail_clean = df_detail_clean.where(pd.notnull(df_detail_clean), None)
             
             # Bulk insert
-            df_detail_clean.to_sql(
-                name='tbl_lifestyle_detail',
-                con=engine,
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
+            insert_dataframe(engine, 'tbl_lifestyle_detail', df_detail_clean, tables)
             
             print(f"   ✅ Successfully inserted {len(df_detail)} rows into 'tbl_lifestyle_detail'")
             successful_uploads += 1
@@ -239,8 +241,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 3: Uploading tbl_lifestyle_rates")
     print("=" * 70)
     
-    rates_file = os.path.join(folder_path, 'tbl_lifestyle_rates.xlsx')
-    if os.path.exists(rates_file):
+    rates_file = find_excel_file(folder_path, 'tbl_lifestyle_rates.xlsx')
+    if rates_file:
         try:
             df_rates = pd.read_excel(rates_file)
             print(f"📊 Found {len(df_rates)} rate records")
@@ -294,8 +296,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 4: Uploading life_style_rates_packages")
     print("=" * 70)
     
-    packages_file = os.path.join(folder_path, 'life_style_rates_packages.xlsx')
-    if os.path.exists(packages_file):
+    packages_file = find_excel_file(folder_path, 'life_style_rates_packages.xlsx')
+    if packages_file:
         try:
             df_packages = pd.read_excel(packages_file)
             print(f"📊 Found {len(df_packages)} package records")
@@ -310,13 +312,7 @@ def upload_lifestyle_data(folder_path):
             df_packages_clean = df_packages_clean.where(pd.notnull(df_packages_clean), None)
             
             # Bulk insert
-            df_packages_clean.to_sql(
-                name='life_style_rates_packages',
-                con=engine,
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
+            insert_dataframe(engine, 'life_style_rates_packages', df_packages_clean, tables)
             
             print(f"   ✅ Successfully inserted {len(df_packages)} rows into 'life_style_rates_packages'")
             successful_uploads += 1
@@ -334,8 +330,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 5: Uploading tbl_lifestyle_inventory")
     print("=" * 70)
     
-    inventory_file = os.path.join(folder_path, 'tbl_lifestyle_inventory.xlsx')
-    if os.path.exists(inventory_file):
+    inventory_file = find_excel_file(folder_path, 'tbl_lifestyle_inventory.xlsx')
+    if inventory_file:
         try:
             df_inventory = pd.read_excel(inventory_file)
             print(f"📊 Found {len(df_inventory)} inventory records")
@@ -360,13 +356,7 @@ def upload_lifestyle_data(folder_path):
             
             for i in range(0, total_rows, chunk_size):
                 chunk = df_inventory_clean.iloc[i:i+chunk_size]
-                chunk.to_sql(
-                    name='tbl_lifestyle_inventory',
-                    con=engine,
-                    if_exists='append',
-                    index=False,
-                    method='multi'
-                )
+                insert_dataframe(engine, 'tbl_lifestyle_inventory', chunk, tables)
                 print(f"   📦 Inserted rows {i+1} to {min(i+chunk_size, total_rows)} of {total_rows}")
             
             print(f"   ✅ Successfully inserted {len(df_inventory)} rows into 'tbl_lifestyle_inventory'")
@@ -385,8 +375,8 @@ def upload_lifestyle_data(folder_path):
     print("STEP 6: Uploading tbl_lifestyle_terms_and_conditions")
     print("=" * 70)
     
-    terms_file = os.path.join(folder_path, 'tbl_lifestyle_terms_and_conditions.xlsx')
-    if os.path.exists(terms_file):
+    terms_file = find_excel_file(folder_path, 'tbl_lifestyle_terms_and_conditions.xlsx')
+    if terms_file:
         try:
             df_terms = pd.read_excel(terms_file)
             print(f"📊 Found {len(df_terms)} terms records")
@@ -401,13 +391,7 @@ def upload_lifestyle_data(folder_path):
             df_terms_clean = df_terms_clean.where(pd.notnull(df_terms_clean), None)
             
             # Bulk insert
-            df_terms_clean.to_sql(
-                name='tbl_lifestyle_terms_and_conditions',
-                con=engine,
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
+            insert_dataframe(engine, 'tbl_lifestyle_terms_and_conditions', df_terms_clean, tables)
             
             print(f"   ✅ Successfully inserted {len(df_terms)} rows into 'tbl_lifestyle_terms_and_conditions'")
             successful_uploads += 1
@@ -10,15 +10,20 @@ Usage:
 Example:
     python upload_to_database.py ./output/session_123
 
+For many small sessions, run upload_worker.py instead: it keeps the database
+connection and table schemas warm and calls upload_excel_to_database in-process.
+
 Requirements:
     pip install pandas sqlalchemy pymysql openpyxl
 """
 
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import column, create_engine, table
 import time
 import os
+import re
 import sys
+import urllib.parse
 
 # Database Configuration
 DB_CONFIG = {
@@ -29,8 +34,11 @@ DB_CONFIG = {
     'database': 'production_test5'
 }
 
+# URL encode the password to handle special characters
+encoded_password = urllib.parse.quote_plus(DB_CONFIG['password'])
+
 # Create database URL
-database_url = f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+database_url = f"mysql+pymysql://{DB_CONFIG['user']}:{encoded_password}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 
 # Table mapping: Excel filename -> Database table name
 TABLE_MAPPING = {
@@ -56,26 +64,120 @@ UPLOAD_ORDER = [
     'hotel_room_daily_inventories.xlsx'
 ]
 
+# The Node server saves session files as <table>_<ISO timestamp>.xlsx,
+# e.g. hotels_2026-10-19T08-30-00-000Z.xlsx
+TIMESTAMPED_SUFFIX_PATTERN = r'_\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z\.xlsx'
+
 
-def upload_excel_to_database(folder_path):
+def is_excel_file_for(filename, excel_file):
     """
-    Upload all Excel files from a folder to the database.
+    Check whether filename is excel_file or a timestamped copy of it.
+    
+    Args:
+        filename: Name of a file in a session folder
+        excel_file: Expected Excel filename, e.g. 'hotels.xlsx'
+    
+    Returns:
+        True if filename holds the data for excel_file
+    """
+    if filename == excel_file:
+        return True
+    stem = excel_file[:-len('.xlsx')]
+    return re.fullmatch(re.escape(stem) + TIMESTAMPED_SUFFIX_PATTERN, filename) is not None
+
+
+def find_excel_file(folder_path, excel_file):
+    """
+    Find the file holding the data for excel_file in a folder.
+    
+    Prefers the exact filename, otherwise the newest timestamped copy.
     
     Args:
         folder_path: Path to folder containing Excel files
+        excel_file: Expected Excel filename, e.g. 'hotels.xlsx'
+    
+    Returns:
+        Path to the file, or None if the folder has no matching file
+    """
+    exact_path = os.path.join(folder_path, excel_file)
+    if os.path.exists(exact_path):
+        return exact_path
+    
+    # ISO timestamps sort chronologically, so the last match is the newest
+    matches = sorted(name for name in os.listdir(folder_path) if is_excel_file_for(name, excel_file))
+    return os.path.join(folder_path, matches[-1]) if matches else None
+
+
+def insert_dataframe(engine, table_name, df, tables=None):
     """
+    Append a DataFrame to a database table.
+    
+    When table_name is in tables (the schemas cached by upload_worker.py), the
+    DataFrame's columns are checked against the cached schema and rows are
+    inserted with a single executemany in one transaction, skipping the table
+    lookups pandas runs on every to_sql call. The insert uses untyped columns so
+    values reach the driver unchanged, as with to_sql.
+    Otherwise falls back to DataFrame.to_sql.
     
-    # Connect to database
-    print("Connecting to database...")
-    try:
-        engine = create_engine(database_url, connect_args={'ssl': {'ssl_disabled': True}})
-        # Test connection
-        with engine.connect() as conn:
-            print("✅ Connected to database successfully!")
-    except Exception as e:
-        print(f"❌ Failed to connect to database: {e}")
+    Args:
+        engine: SQLAlchemy engine
+        table_name: Name of the database table
+        df: pandas DataFrame to insert
+        tables: Optional dict of table name -> reflected sqlalchemy Table
+    """
+    if not tables or table_name not in tables:
+        df.to_sql(
+            name=table_name, 
+            con=engine, 
+            if_exists='append', 
+            index=False,
+            method='multi'  # Use multi-row insert for better performance
+        )
+        return
+    
+    if df.empty:
         return
     
+    # MySQL column names are case-insensitive
+    table_columns = {col.name.lower() for col in tables[table_name].columns}
+    unknown_columns = [name for name in df.columns if str(name).lower() not in table_columns]
+    if unknown_columns:
+        raise ValueError(f"Columns not in table '{table_name}': {', '.join(map(str, unknown_columns))}")
+    
+    # Convert numpy scalars to Python objects and NaN/NaT to None for the DB driver
+    df = df.astype(object)
+    records = df.where(pd.notnull(df), None).to_dict(orient='records')
+    
+    target = table(table_name, *[column(name) for name in df.columns])
+    with engine.begin() as conn:
+        conn.execute(target.insert(), records)
+
+
+def upload_excel_to_database(folder_path, engine=None, tables=None):
+    """
+    Upload all Excel files from a folder to the database.
+    
+    Args:
+        folder_path: Path to folder containing Excel files
+        engine: Optional existing SQLAlchemy engine (a new one is created if omitted)
+        tables: Optional dict of table name -> reflected sqlalchemy Table
+    
+    Returns:
+        Dictionary with upload summary, or None if the database connection failed
+    """
+    
+    if engine is None:
+        # Connect to database
+        print("Connecting to database...")
+        try:
+            engine = create_engine(database_url, connect_args={'ssl': {'ssl_disabled': True}})
+            # Test connection
+            with engine.connect() as conn:
+                print("✅ Connected to database successfully!")
+        except Exception as e:
+            print(f"❌ Failed to connect to database: {e}")
+            return
+    
     start_time = time.time()
     print(f"\n{'='*60}")
     print("Starting bulk upload process...")
@@ -85,9 +187,9 @@ def upload_excel_to_database(folder_path):
     failed_uploads = 0
     
     for excel_file in UPLOAD_ORDER:
-        file_path = os.path.join(folder_path, excel_file)
+        file_path = find_excel_file(folder_path, excel_file)
         
-        if not os.path.exists(file_path):
+        if file_path is None:
             print(f"⚠️  {excel_file} - File not found, skipping...")
             continue
         
@@ -115,13 +217,7 @@ def upload_excel_to_database(folder_path):
             print(f"   Found {len(df)} rows, {len(df.columns)} columns")
             
             # Upload to database
-            df.to_sql(
-                name=table_name, 
-                con=engine, 
-                if_exists='append', 
-                index=False,
-                method='multi'  # Use multi-row insert for better performance
-            )
+            insert_dataframe(engine, table_name, df, tables)
             
             print(f"   ✅ Successfully inserted {len(df)} rows into '{table_name}'")
             successful_uploads += 1
@@ -140,6 +236,12 @@ def upload_excel_to_database(folder_path):
     print(f"❌ Failed uploads: {failed_uploads}")
     print(f"⏱️  Total time: {execution_time:.2f} seconds")
     print(f"{'='*60}\n")
+    
+    return {
+        'success': failed_uploads == 0 and successful_uploads > 0,
+        'successful_uploads': successful_uploads,
+        'failed_uploads': failed_uploads
+    }
 
 
 def upload_single_file(file_path, table_name):
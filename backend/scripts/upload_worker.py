@@ -0,0 +1,643 @@
+"""
+Upload Worker - Long-running uploader for hotel and lifestyle sessions
+
+Running upload_to_database.py / upload_lifestyle_to_database.py once per session
+pays for Python startup, a new engine, the connection handshake and pandas table
+lookups before the first row is sent. This worker does that once: it keeps a warm
+connection pool and cached table schemas, and runs upload_excel_to_database /
+upload_lifestyle_data in-process with a bounded number of concurrent jobs.
+
+Jobs come from two sources (either or both):
+  - Directory watch: every new session folder inside --hotels-dir / --lifestyle-dir
+    is uploaded once it is complete. Folders that already exist when the worker
+    starts are ignored, since they may have been uploaded through the server or the
+    CLI already; pass --backfill to upload them too. A folder is complete when it holds at least one
+    expected Excel file (plain, e.g. hotels.xlsx, or timestamped as the Node server
+    writes them, e.g. hotels_2026-10-19T08-30-00-000Z.xlsx) and either contains the
+    --marker file or, without --marker, has not changed for --settle seconds.
+  - Local socket: JSON lines sent to 127.0.0.1:<--port>, one reply line per job:
+        {"type": "hotels", "folder": "./output/session_123"}
+        {"type": "lifestyle", "folder": "./lifestyle_output/session_123"}
+        {"type": "status"}
+
+Session folders are never written to (the server zips them for download).
+Instead, each job is recorded in <session>-<hash>.json in --state-dir as
+"running" before anything is inserted, and updated with its final status and
+latency when it ends; everything the upload printed goes to <session>-<hash>.log
+next to it, and the console only shows one line per job. A job whose "running"
+record cannot be written is not run. The watcher skips folders that already have
+a state file (including "running" ones left by a crash, which may be partly
+inserted) unless the job was skipped for having no files to upload, so check the
+database and delete the state file to upload a folder again.
+
+SIGTERM and Ctrl+C stop the watcher and socket, let running uploads finish and
+drop queued ones (they are picked up again on the next start).
+
+Usage:
+    python upload_worker.py [--hotels-dir DIR] [--lifestyle-dir DIR] [--port PORT]
+                            [--workers N] [--marker NAME] [--settle SECONDS]
+                            [--state-dir DIR] [--backfill]
+
+Example:
+    python upload_worker.py --hotels-dir ../output --port 8765 --workers 4
+
+Requirements:
+    pip install pandas sqlalchemy pymysql openpyxl
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import MetaData, Table, create_engine
+from sqlalchemy.exc import NoSuchTableError
+
+import upload_lifestyle_to_database as lifestyle_upload
+import upload_to_database as hotel_upload
+from upload_to_database import is_excel_file_for
+
+# Job type -> upload function and the Excel files / tables it handles
+PIPELINES = {
+    'hotels': {
+        'upload': hotel_upload.upload_excel_to_database,
+        'table_mapping': hotel_upload.TABLE_MAPPING
+    },
+    'lifestyle': {
+        'upload': lifestyle_upload.upload_lifestyle_data,
+        'table_mapping': lifestyle_upload.TABLE_MAPPING
+    }
+}
+
+# Both upload scripts use the same DB_CONFIG, so all jobs share one engine
+database_url = hotel_upload.database_url
+
+# Default directory for job state and log files
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upload_worker_state')
+
+# Number of finished jobs kept for the status command
+RECENT_JOBS_LIMIT = 50
+
+
+def create_warm_engine(database_url, pool_size):
+    """
+    Create an engine and open pool_size connections up front so the first
+    jobs do not pay for the connection handshake.
+
+    Connections are not pinged on checkout, which would add a round trip per
+    row for the lifestyle uploads; instead they are recycled well before
+    MySQL's wait_timeout (8 hours by default) closes them.
+
+    Args:
+        database_url: SQLAlchemy database URL
+        pool_size: Number of pooled connections to keep open
+
+    Returns:
+        SQLAlchemy engine
+    """
+    engine = create_engine(
+        database_url,
+        connect_args={'ssl': {'ssl_disabled': True}},
+        pool_size=pool_size,
+        pool_recycle=1800
+    )
+
+    with contextlib.ExitStack() as stack:
+        for _ in range(pool_size):
+            stack.enter_context(engine.connect())
+
+    return engine
+
+
+def reflect_tables(engine, table_names):
+    """
+    Load table schemas once so uploads can check columns and insert without
+    per-call lookups.
+
+    Args:
+        engine: SQLAlchemy engine
+        table_names: Names of the tables to reflect
+
+    Returns:
+        Dictionary of table name -> sqlalchemy Table (missing tables are left out)
+    """
+    metadata = MetaData()
+    tables = {}
+
+    for table_name in table_names:
+        try:
+            tables[table_name] = Table(table_name, metadata, autoload_with=engine)
+        except NoSuchTableError:
+            print(f"⚠️  Table '{table_name}' not found, uploads to it will use pandas")
+
+    return tables
+
+
+def state_file_path(state_dir, folder_path, extension):
+    """
+    Path of the state or log file kept for a session folder.
+
+    Args:
+        state_dir: Directory holding job state files
+        folder_path: Real path of the session folder
+        extension: '.json' for the job record, '.log' for its output
+
+    Returns:
+        Path inside state_dir, unique per session folder
+    """
+    digest = hashlib.sha1(folder_path.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(state_dir, f"{os.path.basename(folder_path)}-{digest}{extension}")
+
+
+def load_job_state(state_dir, folder_path):
+    """
+    Returns:
+        The last job record for a session folder, or None if it was never uploaded
+    """
+    path = state_file_path(state_dir, os.path.realpath(folder_path), '.json')
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Unreadable state still means an upload ran; never insert the folder twice
+        return {'status': 'unknown'}
+
+
+def write_job_state(state_dir, job):
+    """
+    Atomically write a job record to its state file.
+
+    Args:
+        state_dir: Directory holding job state files
+        job: Job record; job['folder'] is the real path of the session folder
+    """
+    path = state_file_path(state_dir, job['folder'], '.json')
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, 'w') as f:
+        json.dump(job, f, indent=2, default=str)
+    os.replace(temp_path, path)
+
+
+def list_session_dirs(watch_dir):
+    """
+    Returns:
+        Paths of the session folders inside an output directory
+    """
+    return [entry.path for entry in os.scandir(watch_dir) if entry.is_dir()]
+
+
+def to_json_safe(value):
+    """
+    Convert a job result to JSON-serializable types (ID maps may have non-string keys).
+
+    Args:
+        value: Result value returned by an upload function
+
+    Returns:
+        Value with dict keys turned into JSON-compatible keys and tuples into lists
+    """
+    if isinstance(value, dict):
+        return {
+            key if isinstance(key, (str, int, float, bool)) else str(key): to_json_safe(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(item) for item in value]
+    return value
+
+
+class JobOutput:
+    """
+    sys.stdout replacement that sends what upload threads print to their own
+    job log, so concurrent jobs do not interleave on the console.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self):
+        """
+        Start capturing the current thread's output.
+
+        Returns:
+            io.StringIO receiving the output
+        """
+        self.local.buffer = io.StringIO()
+        return self.local.buffer
+
+    def release(self):
+        self.local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class UploadWorker:
+    """
+    Runs upload jobs on a bounded thread pool using a warm engine and cached schemas.
+    """
+
+    def __init__(self, workers, state_dir):
+        self.workers = workers
+        self.state_dir = state_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload')
+        self.engine = None
+        self.tables = {}
+        self.output = None
+        self.lock = threading.Lock()
+        self.in_flight = {}  # folder realpath -> Future
+        self.last_status = {}  # folder realpath -> status of its last finished job
+        self.job_ids = itertools.count(1)
+        self.status_counts = Counter()
+        self.recent_jobs = deque(maxlen=RECENT_JOBS_LIMIT)
+
+    def start(self, job_types):
+        """
+        Connect to the database and cache table schemas for the given job types.
+
+        Args:
+            job_types: Keys of PIPELINES this worker will run
+        """
+        print("Connecting to database...")
+        self.engine = create_warm_engine(database_url, self.workers)
+
+        table_names = [
+            table_name
+            for job_type in job_types
+            for table_name in PIPELINES[job_type]['table_mapping'].values()
+        ]
+        self.tables = reflect_tables(self.engine, table_names)
+        print(f"✅ {self.workers} connections ready, {len(self.tables)} table schemas cached "
+              f"({', '.join(job_types)})")
+
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        # Upload functions print progress; keep each job's output in its own log
+        self.output = JobOutput(sys.stdout)
+        sys.stdout = self.output
+
+    def submit(self, job_type, folder_path, source):
+        """
+        Queue a session folder for upload.
+
+        A folder that is already queued or running is not queued again; the
+        existing job's Future is returned instead.
+
+        Args:
+            job_type: Key of PIPELINES ('hotels' or 'lifestyle')
+            folder_path: Path to folder containing Excel files
+            source: Where the job came from ('watch' or 'socket')
+
+        Returns:
+            Future resolving to the finished job record
+        """
+        folder_path = os.path.realpath(folder_path)
+
+        with self.lock:
+            future = self.in_flight.get(folder_path)
+            if future is not None:
+                return future
+
+            job = {
+                'job_id': next(self.job_ids),
+                'type': job_type,
+                'folder': folder_path,
+                'source': source,
+                'status': 'queued',
+                'queued_at': time.time()
+            }
+            print(f"📥 Job {job['job_id']} queued: {job_type} {folder_path} ({source})")
+
+            future = self.executor.submit(self._run_job, job)
+            self.in_flight[folder_path] = future
+            return future
+
+    def is_in_flight(self, folder_path):
+        with self.lock:
+            return os.path.realpath(folder_path) in self.in_flight
+
+    def job_status(self, folder_path):
+        """
+        Returns:
+            Status of the last job for a session folder, or None if it never ran.
+            Jobs from this process are known even if their state file could not
+            be written.
+        """
+        folder_path = os.path.realpath(folder_path)
+        with self.lock:
+            status = self.last_status.get(folder_path)
+        if status is not None:
+            return status
+
+        state = load_job_state(self.state_dir, folder_path)
+        return state.get('status') if state is not None else None
+
+    def _run_job(self, job):
+        pipeline = PIPELINES[job['type']]
+        start_time = time.time()
+        job['queued_seconds'] = round(start_time - job.pop('queued_at'), 3)
+        job['log_file'] = state_file_path(self.state_dir, job['folder'], '.log')
+        job['status'] = 'running'
+        log = self.output.capture()
+
+        try:
+            # Record the job before inserting anything, so neither a failed state
+            # write nor a crash mid-upload can get the folder inserted twice
+            write_job_state(self.state_dir, job)
+        except Exception as e:
+            job['status'] = 'error'
+            job['error'] = f"Could not write job state, upload not started: {e}"
+        else:
+            try:
+                result = pipeline['upload'](job['folder'], engine=self.engine, tables=self.tables)
+                job['result'] = to_json_safe(result)
+                if result and result['successful_uploads'] + result['failed_uploads'] == 0:
+                    job['status'] = 'skipped'  # No expected Excel files in the folder
+                elif result and result['success']:
+                    job['status'] = 'success'
+                else:
+                    job['status'] = 'failed'
+            except Exception as e:
+                job['status'] = 'error'
+                job['error'] = str(e)
+        finally:
+            self.output.release()
+            job['latency_seconds'] = round(time.time() - start_time, 3)
+
+            try:
+                with open(job['log_file'], 'w', encoding='utf-8') as f:
+                    f.write(log.getvalue())
+                write_job_state(self.state_dir, job)
+            except Exception as e:
+                print(f"⚠️  Could not write state for job {job['job_id']}: {e}")
+
+            icon = '✅' if job['status'] == 'success' else '⚠️ ' if job['status'] == 'skipped' else '❌'
+            print(f"{icon} Job {job['job_id']} {job['status']}: {job['type']} {job['folder']} "
+                  f"in {job['latency_seconds']:.2f}s (queued {job['queued_seconds']:.2f}s)")
+
+            with self.lock:
+                self.in_flight.pop(job['folder'], None)
+                self.last_status[job['folder']] = job['status']
+                self.status_counts[job['status']] += 1
+                self.recent_jobs.append(job)
+
+        return job
+
+    def status(self):
+        """
+        Returns:
+            Dictionary with job counts by status, running/queued jobs and recent jobs
+        """
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'in_flight': len(self.in_flight),
+                'counts': dict(self.status_counts),
+                'recent_jobs': list(self.recent_jobs)
+            }
+
+    def shutdown(self):
+        # Running uploads finish; queued ones have no state yet and run on the next start
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.engine is not None:
+            self.engine.dispose()
+        if self.output is not None:
+            sys.stdout = self.output.stream
+
+
+def is_session_ready(folder_path, expected_files, marker, settle_seconds):
+    """
+    Check whether a session folder has finished being written.
+
+    Args:
+        folder_path: Path to the session folder
+        expected_files: Excel filenames the upload reads
+        marker: Name of the file signalling completion, or None
+        settle_seconds: Quiet period required when no marker is used
+
+    Returns:
+        True if the folder should be uploaded now
+    """
+    try:
+        entries = list(os.scandir(folder_path))
+
+        if not any(is_excel_file_for(entry.name, excel_file)
+                   for entry in entries for excel_file in expected_files):
+            return False
+
+        if marker:
+            return any(entry.name == marker for entry in entries)
+
+        last_modified = max(
+            [entry.stat().st_mtime for entry in entries] + [os.stat(folder_path).st_mtime]
+        )
+    except OSError:
+        # Folder or file removed while scanning (the server cleans up old sessions)
+        return False
+
+    return time.time() - last_modified >= settle_seconds
+
+
+def watch_directories(worker, watch_dirs, marker, settle_seconds, poll_interval, stop_event,
+                      ignored_dirs=()):
+    """
+    Poll the watched output directories and queue complete session folders.
+
+    Args:
+        worker: UploadWorker to submit jobs to
+        watch_dirs: Dictionary of job type -> output directory
+        marker: Name of the file signalling completion, or None
+        settle_seconds: Quiet period required when no marker is used
+        poll_interval: Seconds between scans
+        stop_event: threading.Event that ends the loop when set
+        ignored_dirs: Real paths of session folders never to upload
+    """
+    ignored_dirs = set(ignored_dirs)
+
+    while not stop_event.is_set():
+        for job_type, watch_dir in watch_dirs.items():
+            expected_files = PIPELINES[job_type]['table_mapping']
+
+            try:
+                session_dirs = list_session_dirs(watch_dir)
+            except OSError as e:
+                print(f"⚠️  Cannot scan {watch_dir}: {e}")
+                continue
+
+            for session_dir in session_dirs:
+                try:
+                    if os.path.realpath(session_dir) in ignored_dirs or worker.is_in_flight(session_dir):
+                        continue
+                    status = worker.job_status(session_dir)
+                    if status is not None and status != 'skipped':
+                        continue
+                    if is_session_ready(session_dir, expected_files, marker, settle_seconds):
+                        worker.submit(job_type, session_dir, 'watch')
+                except Exception as e:
+                    # Keep watching even if one folder cannot be checked
+                    print(f"⚠️  Error checking {session_dir}: {e}")
+
+        stop_event.wait(poll_interval)
+
+
+class JobRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles JSON-line job requests; replies with one JSON line per request
+    once the job has finished.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+                reply = json.dumps(self.handle_request(request), default=str)
+            except Exception as e:
+                reply = json.dumps({'status': 'error', 'error': str(e)})
+
+            self.wfile.write((reply + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+    def handle_request(self, request):
+        worker = self.server.worker
+        job_type = request.get('type')
+
+        if job_type == 'status':
+            return worker.status()
+
+        if job_type not in PIPELINES:
+            return {'status': 'error', 'error': f"Unknown job type: {job_type!r}"}
+
+        folder_path = request.get('folder')
+        if not folder_path or not os.path.isdir(folder_path):
+            return {'status': 'error', 'error': f"'{folder_path}' is not a valid directory"}
+
+        return worker.submit(job_type, folder_path, 'socket').result()
+
+
+class JobServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port, worker):
+        super().__init__(('127.0.0.1', port), JobRequestHandler)
+        self.worker = worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-running hotel/lifestyle database upload worker')
+    parser.add_argument('--hotels-dir', help='Hotel output directory to watch for session folders')
+    parser.add_argument('--lifestyle-dir', help='Lifestyle output directory to watch for session folders')
+    parser.add_argument('--port', type=int, help='Accept JSON-line jobs on 127.0.0.1:PORT')
+    parser.add_argument('--workers', type=int, default=2, help='Maximum concurrent uploads (default: 2)')
+    parser.add_argument('--marker', help='Only upload session folders containing this file')
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help='Seconds a folder must be unchanged before upload when no --marker is set (default: 5)')
+    parser.add_argument('--poll', type=float, default=1.0, help='Seconds between directory scans (default: 1)')
+    parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR,
+                        help='Directory for job state and log files (default: scripts/upload_worker_state)')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Also upload session folders that already exist when the worker starts')
+    args = parser.parse_args()
+
+    watch_dirs = {}
+    if args.hotels_dir:
+        watch_dirs['hotels'] = args.hotels_dir
+    if args.lifestyle_dir:
+        watch_dirs['lifestyle'] = args.lifestyle_dir
+
+    if not watch_dirs and args.port is None:
+        parser.print_usage()
+        print("❌ Error: give at least one of --hotels-dir, --lifestyle-dir or --port")
+        sys.exit(1)
+
+    for watch_dir in watch_dirs.values():
+        if not os.path.isdir(watch_dir):
+            print(f"❌ Error: '{watch_dir}' is not a valid directory")
+            sys.exit(1)
+
+    # Socket jobs may be of either type
+    job_types = list(PIPELINES) if args.port is not None else list(watch_dirs)
+
+    worker = UploadWorker(max(1, args.workers), args.state_dir)
+    try:
+        worker.start(job_types)
+    except Exception as e:
+        print(f"❌ Failed to connect to database: {e}")
+        sys.exit(1)
+
+    stop_event = threading.Event()
+    threads = []
+    server = None
+
+    if args.port is not None:
+        server = JobServer(args.port, worker)
+        threads.append(threading.Thread(target=server.serve_forever, daemon=True))
+        print(f"🔌 Accepting jobs on 127.0.0.1:{args.port}")
+
+    if watch_dirs:
+        # Sessions from before startup may already be in the database
+        ignored_dirs = set()
+        if not args.backfill:
+            for watch_dir in watch_dirs.values():
+                ignored_dirs.update(os.path.realpath(path) for path in list_session_dirs(watch_dir))
+
+        threads.append(threading.Thread(
+            target=watch_directories,
+            args=(worker, watch_dirs, args.marker, args.settle, args.poll, stop_event, ignored_dirs),
+            daemon=True
+        ))
+        for job_type, watch_dir in watch_dirs.items():
+            print(f"👀 Watching {watch_dir} for {job_type} sessions")
+        if ignored_dirs:
+            print(f"   Ignoring {len(ignored_dirs)} existing session folders (use --backfill to upload them)")
+
+    # Stop the same way on SIGTERM (process managers) as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while not stop_event.is_set():
+            stop_event.wait(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\nShutting down, waiting for running uploads to finish...")
+        stop_event.set()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        worker.shutdown()
+
+
+if __name__ == '__main__':
+    main()